@@ -12,12 +12,17 @@ Date: 2025-10-22
 """
 
 import argparse
+import codecs
 import os
+import shutil
 import sys
-import glob
-import math
-from datetime import datetime
-import colorama
+import tempfile
+import fnmatch
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
 
 # ===== Metadata =====
 AUTHOR  = "Igor Brzezek"
@@ -36,130 +41,276 @@ SUPPORTED_FORMATS = {
     'UTF16LE': 'utf-16-le',
     'UTF16BE': 'utf-16-be'
 }
+# Priority list of fallback encodings for Polish text; decoders are resolved once, not per file.
+_FALLBACK_DECODERS = {
+    'windows-1250': codecs.lookup('cp1250').incrementaldecoder,
+    'iso8859_2': codecs.lookup('iso8859-2').incrementaldecoder,
+}
+MAX_WORKERS = (os.cpu_count() or 1) * 2 # Threads used for batch detection/conversion
+PRINT_LOCK = threading.Lock()
+CONVERT_BLOCK_SIZE = 1 << 20 # Bytes decoded/encoded per step while converting
 
-# ===== chardet dependency =====
+# ===== Detector dependency (chardetng-py preferred, chardet as fallback) =====
 try:
-    import chardet
+    import chardetng_py
 except ImportError:
-    print("ERROR: Missing required module 'chardet'. Install it with:")
-    print("    pip install chardet")
-    sys.exit(1)
+    chardetng_py = None
+    try:
+        from chardet import UniversalDetector
+    except ImportError:
+        print("ERROR: Missing required module 'chardetng-py' or 'chardet'. Install one with:")
+        print("    pip install chardetng-py")
+        sys.exit(1)
+
+DETECT_CHUNK_SIZE = 16384 # Bytes fed to the detector per step
+SNIFF_SIZE = 65536 # chardetng has no 'done' signal: it stops after this many bytes once it has seen non-ASCII
+
+# Byte order marks; the UTF-32-LE one must be checked before its UTF-16-LE prefix.
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+def sniff_bom(head):
+    """Returns (encoding, bom) if the data starts with a byte order mark, else (None, b'')."""
+    for bom, enc in _BOMS:
+        if head.startswith(bom): return enc, bom
+    return None, b''
+
+def detect_chunks(chunks):
+    """Feeds byte chunks to the detector, stopping as soon as it is certain."""
+    if chardetng_py is not None:
+        detector, fed = chardetng_py.EncodingDetector(), 0
+        for chunk in chunks:
+            fed += len(chunk)
+            if detector.feed(chunk, last=False) and fed >= SNIFF_SIZE: break
+        return {'encoding': detector.guess(tld=None, allow_utf8=True), 'confidence': 1.0}
+    detector = UniversalDetector()
+    for chunk in chunks:
+        detector.feed(chunk)
+        if detector.done: break
+    detector.close()
+    return detector.result
+
+def read_chunks(f, sample_size=None):
+    """Yields detector-sized chunks of a binary file, at most 'sample_size' bytes in total."""
+    remaining = sample_size
+    while remaining is None or remaining > 0:
+        chunk = f.read(DETECT_CHUNK_SIZE if remaining is None else min(DETECT_CHUNK_SIZE, remaining))
+        if not chunk: return
+        if remaining is not None: remaining -= len(chunk)
+        yield chunk
 
 # ===== Color support =====
-class AnsiColors:
-    """Helper class for aesthetic color output."""
-    def __init__(self):
-        self.enabled = False
-        self.BLUE, self.GREEN, self.YELLOW, self.RED = "", "", "", ""
-        self.CYAN, self.MAGENTA, self.GREY, self.RESET = "", "", "", ""
-
-    def set_enabled(self, enabled):
-        if enabled and sys.stdout.isatty():
-            self.enabled = True
-            self.BLUE, self.GREEN, self.YELLOW, self.RED = colorama.Fore.BLUE, colorama.Fore.GREEN, colorama.Fore.YELLOW, colorama.Fore.RED
-            self.CYAN, self.MAGENTA, self.GREY, self.RESET = colorama.Fore.CYAN, colorama.Fore.MAGENTA, colorama.Style.DIM, colorama.Style.RESET_ALL
-        else:
-            self.enabled = False
-            self.BLUE, self.GREEN, self.YELLOW, self.RED = "", "", "", ""
-            self.CYAN, self.MAGENTA, self.GREY, self.RESET = "", "", "", ""
+# set_colors_enabled() rebinds C once; colorama is only imported and initialized when colors are used.
+_Palette = namedtuple('_Palette', 'BLUE GREEN YELLOW RED CYAN MAGENTA GREY RESET')
+_COLORS_OFF = _Palette("", "", "", "", "", "", "", "")
+
+def set_colors_enabled(enabled):
+    """Selects the color palette; colors are only used on an interactive terminal."""
+    global C
+    C = _COLORS_OFF
+    if enabled and sys.stdout.isatty():
+        try:
+            import colorama
+        except ImportError:
+            return # Plain output without colorama
+        colorama.init()
+        C = _Palette(colorama.Fore.BLUE, colorama.Fore.GREEN, colorama.Fore.YELLOW, colorama.Fore.RED,
+                     colorama.Fore.CYAN, colorama.Fore.MAGENTA, colorama.Style.DIM, colorama.Style.RESET_ALL)
 
-C = AnsiColors()
+C = _COLORS_OFF
 
 # ===== Helper functions =====
 def format_size(size_bytes):
     """Formats size in bytes to a human-readable string."""
     if size_bytes == 0: return "0 B"
     size_names = ("B", "KB", "MB", "GB", "TB", "PB", "EB", "ZB", "YB")
-    i = int(math.floor(math.log(size_bytes, 1024)))
-    p = math.pow(1024, i)
-    s = round(size_bytes / p, 2)
+    i = min((size_bytes.bit_length() - 1) // 10, len(size_names) - 1) # floor(log1024) in integer ops
+    s = round(size_bytes / (1 << (i * 10)), 2)
     return f"{s} {size_names[i]}"
 
-def detect_encoding(filename):
+def detect_encoding(filename, sample_size=None):
     """Detect the text file encoding for display purposes."""
     try:
-        with open(filename, 'rb') as f: data = f.read()
-        if not data: return 'empty', 1.0
-        result = chardet.detect(data)
+        with open(filename, 'rb') as f:
+            head = f.peek(4)
+            if not head: return 'empty', 1.0
+            bom_encoding, _ = sniff_bom(head)
+            if bom_encoding: return bom_encoding, 1.0
+            result = detect_chunks(read_chunks(f, sample_size))
         return result.get('encoding', 'unknown'), result.get('confidence', 0)
     except (IOError, PermissionError) as e:
         return f"Error: {e}", 0
 
-def convert_encoding(file_in, file_out, target_format):
+def decoded_blocks(f, decoder, start=0):
+    """
+    Yields the decoded text of the open binary file 'f' from offset 'start', block by block.
+    Blocks are read into one reused buffer and decoded from memoryview slices (no new bytes object per block).
+    """
+    buf = bytearray(CONVERT_BLOCK_SIZE)
+    view = memoryview(buf)
+    f.seek(start)
+    for n in iter(lambda: f.readinto(buf), 0):
+        yield decoder.decode(view[:n])
+    yield decoder.decode(b'', final=True)
+
+def transcode(f, src_enc, file_out, dst_enc, start=0):
+    """
+    Streams the open binary file 'f' (from offset 'start') from src_enc into file_out encoded as dst_enc.
+    Output is staged in an anonymous temporary file and copied into file_out only when the whole input decoded,
+    so a failed candidate never touches file_out. 'f' is closed first, as with -o same as -i it is the file overwritten.
+    """
+    decoder = (_FALLBACK_DECODERS.get(src_enc) or codecs.getincrementaldecoder(src_enc))('strict')
+    utf8_out = dst_enc in ('utf-8', 'utf-8-sig')
+    with (tempfile.TemporaryFile() if utf8_out else tempfile.TemporaryFile('w+', encoding=dst_enc, newline='')) as tmp:
+        if utf8_out:
+            # UTF-8 targets bypass TextIOWrapper: each block is encoded in one call and written as bytes.
+            if dst_enc == 'utf-8-sig': tmp.write(codecs.BOM_UTF8)
+            for text in decoded_blocks(f, decoder, start):
+                tmp.write(text.encode('utf-8'))
+        else:
+            for text in decoded_blocks(f, decoder, start):
+                tmp.write(text)
+        tmp.flush()
+        staged = tmp if utf8_out else tmp.buffer
+        staged.seek(0)
+        f.close()
+        # Writing through open() keeps an existing output's symlink, hardlinks, mode and owner.
+        with open(file_out, 'wb') as fout:
+            shutil.copyfileobj(staged, fout, CONVERT_BLOCK_SIZE)
+
+def _convert_encoding(file_in, file_out, target_format, sample_size, log):
     """
     Robustly converts file encoding using a priority list for Polish encodings.
     """
+    BLUE, GREEN, YELLOW, RED, CYAN, MAGENTA, GREY, RESET = C
     target_format_upper = target_format.upper()
     
     try:
-        with open(file_in, 'rb') as f:
-            raw_data = f.read()
+        f = open(file_in, 'rb')
+        head = f.peek(4)
     except (IOError, PermissionError) as e:
-        print(f"{C.RED}Error: Cannot read file '{file_in}': {e}{C.RESET}")
+        log(f"{RED}Error: Cannot read file '{file_in}': {e}{RESET}")
         return
 
-    if not raw_data:
-        open(file_out, 'w').close()
-        print(f"{C.GREEN}[OK]{C.RESET} Created empty file {C.CYAN}{file_out}{C.RESET} ({target_format_upper})")
-        return
-        
-    detection = chardet.detect(raw_data)
-    detected_encoding = detection.get('encoding')
-    confidence = detection.get('confidence')
-    print(f"{C.BLUE}[INFO]{C.RESET} Chardet detected: {C.YELLOW}{detected_encoding or 'unknown'}{C.RESET} (confidence {confidence*100:.1f}%)")
+    with f:
+        if not head:
+            open(file_out, 'w').close()
+            log(f"{GREEN}[OK]{RESET} Created empty file {CYAN}{file_out}{RESET} ({target_format_upper})")
+            return
 
-    text = None
-    
-    # Priority list of encodings for Polish text.
-    encodings_to_try = [
-        'windows-1250',
-        'iso8859_2',
-    ]
-    # Add chardet's suggestion if it's not a priority one and exists
-    if detected_encoding and detected_encoding not in encodings_to_try:
-        encodings_to_try.append(detected_encoding)
-
-    # If a UTF format is detected, trust it first.
-    if detected_encoding and 'utf' in detected_encoding.lower():
-        try:
-            text = raw_data.decode(detected_encoding)
-            print(f"{C.BLUE}[INFO]{C.RESET} Successfully decoded using detected Unicode format: '{detected_encoding}'.")
-        except UnicodeDecodeError:
-            text = None # Mark as failed to allow fallbacks
+        dst_enc = SUPPORTED_FORMATS[target_format_upper]
 
-    if text is None: # If not decoded yet (not UTF or UTF decoding failed)
-        for enc in encodings_to_try:
+        # A BOM settles the encoding; it is skipped when decoding with that encoding.
+        detected_encoding, bom = sniff_bom(head)
+        # NULs are valid UTF-8 but mark BOM-less UTF-16/32 text (ASCII-range UTF-16 would pass as UTF-8): leave those to the detector.
+        utf8_trial = not detected_encoding and b'\x00' not in f.read(SNIFF_SIZE)
+        if utf8_trial:
+            # Most files are valid UTF-8, and CPython's strict UTF-8 decoder validates that far faster than any detector.
             try:
-                text = raw_data.decode(enc)
+                transcode(f, 'utf-8', file_out, dst_enc)
+            except UnicodeDecodeError:
+                pass # Not UTF-8, run the detector
+            except Exception as e:
+                log(f"{RED}Error writing to file {file_out}:{RESET} {e}")
+                return
+            else:
+                log(f"{BLUE}[INFO]{RESET} Valid UTF-8, detection skipped.")
+                log(f"{GREEN}[OK]{RESET} Saved as {CYAN}{file_out}{RESET} ({target_format_upper})")
+                return
+
+        if detected_encoding:
+            confidence = 1.0
+        else:
+            f.seek(0)
+            detection = detect_chunks(read_chunks(f, sample_size))
+            detected_encoding = detection.get('encoding')
+            confidence = detection.get('confidence')
+        log(f"{BLUE}[INFO]{RESET} Detected: {YELLOW}{detected_encoding or 'unknown'}{RESET} (confidence {confidence*100:.1f}%)")
+
+        # One ordered candidate list: a detected UTF format first (trusted), then the
+        # priority list of encodings for Polish text, then any other detector suggestion.
+        is_utf = bool(detected_encoding) and 'utf' in detected_encoding.lower()
+        candidates = [detected_encoding] if is_utf else []
+        candidates.extend(enc for enc in _FALLBACK_DECODERS if enc not in candidates)
+        if detected_encoding and detected_encoding not in candidates:
+            candidates.append(detected_encoding)
+        if utf8_trial:
+            # The strict UTF-8 pass above already failed; don't repeat it.
+            candidates = [enc for enc in candidates if enc.lower().replace('_', '-') not in ('utf-8', 'utf8')]
+
+        decoded_with = None
+        try:
+            for enc in candidates:
+                try:
+                    transcode(f, enc, file_out, dst_enc, len(bom) if enc == detected_encoding else 0)
+                except (UnicodeDecodeError, LookupError):
+                    continue
+                decoded_with = enc
                 if enc != detected_encoding:
-                    print(f"{C.YELLOW}[INFO]{C.RESET} Used fallback '{enc}' for successful decoding.")
+                    log(f"{YELLOW}[INFO]{RESET} Used fallback '{enc}' for successful decoding.")
+                elif is_utf:
+                    log(f"{BLUE}[INFO]{RESET} Successfully decoded using detected Unicode format: '{enc}'.")
                 else:
-                    print(f"{C.BLUE}[INFO]{C.RESET} Successfully decoded using '{enc}'.")
-                break 
-            except (UnicodeDecodeError, TypeError):
-                continue
+                    log(f"{BLUE}[INFO]{RESET} Successfully decoded using '{enc}'.")
+                break
+        except Exception as e:
+            log(f"{RED}Error writing to file {file_out}:{RESET} {e}")
+            return
 
-    if text is None:
-        print(f"{C.RED}ERROR: All decoding attempts failed. Could not correctly read the source file. Conversion aborted.{C.RESET}")
+    if decoded_with is None:
+        log(f"{RED}ERROR: All decoding attempts failed. Could not correctly read the source file. Conversion aborted.{RESET}")
         return
 
+    log(f"{GREEN}[OK]{RESET} Saved as {CYAN}{file_out}{RESET} ({target_format_upper})")
+
+def convert_encoding(file_in, file_out, target_format, sample_size=None):
+    """Converts one file and prints its messages as one block, so parallel batch output stays readable."""
+    messages = []
     try:
-        with open(file_out, 'w', encoding=SUPPORTED_FORMATS[target_format_upper], newline='') as fout:
-            fout.write(text)
-        print(f"{C.GREEN}[OK]{C.RESET} Saved as {C.CYAN}{file_out}{C.RESET} ({target_format_upper})")
-    except Exception as e:
-        print(f"{C.RED}Error writing to file {file_out}:{C.RESET} {e}")
+        _convert_encoding(file_in, file_out, target_format, sample_size, messages.append)
+    finally:
+        if messages:
+            with PRINT_LOCK:
+                print('\n'.join(messages))
+
+def iter_files(ext, base_dir, recursive):
+    """
+    Yields DirEntry objects of files matching '*.ext' (like glob: hidden entries are skipped).
+    Entries cache their stat() result, so callers need no extra syscall per file.
+    """
+    if any(c in ext for c in '*?['):
+        pattern = f'*.{ext}'
+        matches = lambda name: fnmatch.fnmatch(name, pattern)
+    else:
+        suffix = os.path.normcase(f'.{ext}')
+        matches = lambda name: os.path.normcase(name).endswith(suffix)
+    try:
+        with os.scandir(base_dir) as it:
+            entries = list(it)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith('.'): continue
+        if entry.is_file() and matches(entry.name):
+            yield entry
+        elif recursive and entry.is_dir(follow_symlinks=False):
+            yield from iter_files(ext, entry.path, recursive)
 
 def get_files(ext, base_dir, recursive):
-    """Constructs path and gets file list based on recursive flag."""
-    pattern = os.path.join(base_dir, '**', f'*.{ext}') if recursive else os.path.join(base_dir, f'*.{ext}')
-    return sorted(glob.glob(pattern, recursive=recursive))
+    """Gets matching DirEntry objects sorted by directory, then path, so each directory's files are adjacent."""
+    return sorted(iter_files(ext, base_dir, recursive), key=lambda e: (os.path.dirname(e.path), e.path))
 
 # === FUNKCJA ZMODYFIKOWANA (dodany argument 'overwrite' i logika sprawdzania) ===
-def process_all(ext, target_format, suffix=None, base_dir='.', recursive=False, overwrite=False):
+def process_all(ext, target_format, suffix=None, base_dir='.', recursive=False, overwrite=False, sample_size=None):
     """Batch process all files with given extension."""
+    BLUE, GREEN, YELLOW, RED, CYAN, MAGENTA, GREY, RESET = C
     ext, suffix = ext.lstrip('.'), suffix or target_format.upper()
-    files = get_files(ext, base_dir, recursive)
+    files = [entry.path for entry in get_files(ext, base_dir, recursive)]
     
     if not files:
         print(f"No files found with extension .{ext} in {os.path.abspath(base_dir)}")
@@ -168,67 +319,80 @@ def process_all(ext, target_format, suffix=None, base_dir='.', recursive=False,
     # --- NOWA LOGIKA SPRAWDZANIA PRZED URUCHOMIENIEM ---
     existing_files = []
     output_map = [] # Przechowuje pary (plik_in, plik_out)
+    # Name comparison follows the filesystem: case-insensitive on Windows (normcase) and on macOS's default APFS.
+    name_key = str.lower if sys.platform == 'darwin' else os.path.normcase
+    dir_names = {} # Output directory -> keys of all its entries, one scandir per directory instead of a stat() per file
     
     for fname in files:
         base, extension = os.path.splitext(fname)
         new_name = f"{base}_{suffix}{extension}"
         output_map.append((fname, new_name)) # Zapisz parę
-        if os.path.exists(new_name):
+        out_dir = os.path.dirname(new_name) or '.'
+        if out_dir not in dir_names:
+            try:
+                dir_names[out_dir] = {name_key(e.name) for e in os.scandir(out_dir)}
+            except OSError:
+                dir_names[out_dir] = set()
+        if name_key(os.path.basename(new_name)) in dir_names[out_dir]:
             existing_files.append(new_name)
 
     if existing_files and not overwrite:
-        print(f"{C.RED}ERROR:{C.RESET} The following {len(existing_files)} output file(s) already exist:")
+        print(f"{RED}ERROR:{RESET} The following {len(existing_files)} output file(s) already exist:")
         for f in existing_files:
             print(f"  - {f}")
         try:
             response = input(f"Overwrite all conflicting files and continue batch processing? [y/N]: ").strip().lower()
             if response != 'y':
-                print(f"{C.YELLOW}Aborted by user. No files were converted.{C.RESET}")
+                print(f"{YELLOW}Aborted by user. No files were converted.{RESET}")
                 return # Zatrzymaj całą operację
         except KeyboardInterrupt:
-            print(f"\n{C.YELLOW}Aborted by user (Ctrl+C). No files were converted.{C.RESET}")
+            print(f"\n{YELLOW}Aborted by user (Ctrl+C). No files were converted.{RESET}")
             return # Zatrzymaj całą operację
     # --- KONIEC NOWEJ LOGIKI SPRAWDZANIA ---
 
-    print(f"Processing {C.YELLOW}{len(files)}{C.RESET} file(s) with extension {C.MAGENTA}.{ext}{C.RESET} in {C.CYAN}{os.path.abspath(base_dir)}{C.RESET}")
+    print(f"Processing {YELLOW}{len(files)}{RESET} file(s) with extension {MAGENTA}.{ext}{RESET} in {CYAN}{os.path.abspath(base_dir)}{RESET}")
     
     # Przetwarzaj tylko jeśli użytkownik się zgodził (lub nie było konfliktów)
+    # Inputs that are also outputs of this batch (re-runs) wait until their writers are done.
+    outputs = {name_key(fname_out) for _, fname_out in output_map}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        list(ex.map(lambda p: convert_encoding(*p, target_format, sample_size), [p for p in output_map if name_key(p[0]) not in outputs]))
     for fname_in, fname_out in output_map:
-        convert_encoding(fname_in, fname_out, target_format)
+        if name_key(fname_in) in outputs:
+            convert_encoding(fname_in, fname_out, target_format, sample_size)
         
     print("Batch conversion complete.")
 
-def show_files_info(ext, base_dir='.', recursive=False, show_stats=False, fixed_width=False):
+def show_files_info(ext, base_dir='.', recursive=False, show_stats=False, fixed_width=False, sample_size=None):
     """Show encoding and optionally stats for files."""
+    BLUE, GREEN, YELLOW, RED, CYAN, MAGENTA, GREY, RESET = C
     ext = ext.lstrip('.')
     files = get_files(ext, base_dir, recursive)
     if not files:
         print(f"No files found with extension .{ext} in {os.path.abspath(base_dir)}")
         return
 
-    files_by_dir = {}
-    for f in files:
-        dir_path = os.path.dirname(f) or '.'
-        if dir_path not in files_by_dir: files_by_dir[dir_path] = []
-        files_by_dir[dir_path].append(f)
+    # Detection runs in parallel; the printing pass below stays single-threaded and ordered.
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        detected = dict(zip(files, ex.map(lambda e: detect_encoding(e.path, sample_size), files)))
 
     total_files, total_size = 0, 0
-    for dir_path, dir_file_list in sorted(files_by_dir.items()):
+    for dir_path, dir_file_list in groupby(files, key=lambda e: os.path.dirname(e.path) or '.'):
         if recursive or (not recursive and base_dir != dir_path):
-             print(f"\n{C.GREEN}Directory: {C.CYAN}{os.path.abspath(dir_path)}{C.RESET}")
+             print(f"\n{GREEN}Directory: {CYAN}{os.path.abspath(dir_path)}{RESET}")
 
         dir_data, max_widths = [], {'name': 0, 'enc': 0, 'size': 0}
         dir_files, dir_size = 0, 0
 
-        for fname in dir_file_list:
-            data = {'basename_raw': os.path.basename(fname)}
-            encoding, conf = detect_encoding(fname)
+        for entry in dir_file_list:
+            data = {'basename_raw': entry.name}
+            encoding, conf = detected[entry]
             data['enc_raw'] = f"{encoding} ({conf*100:.1f}%)"
             if show_stats:
                 try:
-                    stats = os.stat(fname)
+                    stats = entry.stat()
                     file_size = stats.st_size
-                    data['size_raw'], data['date_raw'] = format_size(file_size), datetime.fromtimestamp(stats.st_ctime).strftime('%Y-%m-%d %H:%M:%S')
+                    data['size_raw'], data['date_raw'] = format_size(file_size), time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_ctime))
                     dir_files += 1; dir_size += file_size
                     total_files += 1; total_size += file_size
                 except OSError: data['error'] = "Stats not accessible"
@@ -238,25 +402,31 @@ def show_files_info(ext, base_dir='.', recursive=False, show_stats=False, fixed_
                 max_widths['enc'] = max(max_widths['enc'], len(data['enc_raw']))
                 if show_stats and 'size_raw' in data: max_widths['size'] = max(max_widths['size'], len(data['size_raw']))
 
+        # Widths stay 0 without --rem, and ljust(0)/rjust(0) leave the value as is.
+        w_name, w_enc, w_size = max_widths['name'], max_widths['enc'], max_widths['size']
+        out_lines = [] # Written with a single call per directory instead of one print() per file
         for data in dir_data:
-            name_pad = ' ' * (max_widths['name'] - len(data['basename_raw'])) if fixed_width else ''
-            enc_pad = ' ' * (max_widths['enc'] - len(data['enc_raw'])) if fixed_width else ''
-            line = f"  -> {C.CYAN}{data['basename_raw']}{C.RESET}{name_pad} | {C.YELLOW}{data['enc_raw']}{C.RESET}{enc_pad}"
+            line = f"  -> {CYAN}{data['basename_raw'].ljust(w_name)}{RESET} | {YELLOW}{data['enc_raw'].ljust(w_enc)}{RESET}"
             if show_stats:
-                if 'error' in data: line += f" | {C.RED}{data['error']}{C.RESET}"
+                if 'error' in data: line += f" | {RED}{data['error']}{RESET}"
                 else:
-                    size_pad = ' ' * (max_widths['size'] - len(data['size_raw'])) if fixed_width else ''
-                    line += f" | {size_pad}{C.MAGENTA}{data['size_raw']}{C.RESET} | {C.GREY}{data['date_raw']}{C.RESET}"
-            print(line)
+                    line += f" | {MAGENTA}{data['size_raw'].rjust(w_size)}{RESET} | {GREY}{data['date_raw']}{RESET}"
+            out_lines.append(line)
 
         if show_stats and dir_files > 0:
-            print(f"{C.YELLOW}--- Subtotal: {dir_files} file(s), Total size: {format_size(dir_size)} ---{C.RESET}")
+            out_lines.append(f"{YELLOW}--- Subtotal: {dir_files} file(s), Total size: {format_size(dir_size)} ---{RESET}")
+        sys.stdout.write('\n'.join(out_lines) + '\n')
 
     if show_stats and total_files > 0:
-        print(f"\n{C.BLUE}==================================================================={C.RESET}")
-        print(f"{C.GREEN}Grand Total: {total_files} file(s), Total cumulative size: {format_size(total_size)}{C.RESET}")
-        print(f"{C.BLUE}==================================================================={C.RESET}")
+        print(f"\n{BLUE}==================================================================={RESET}")
+        print(f"{GREEN}Grand Total: {total_files} file(s), Total cumulative size: {format_size(total_size)}{RESET}")
+        print(f"{BLUE}==================================================================={RESET}")
+
 
+def show_file_encoding(filename, sample_size=None):
+    """Print the detected encoding of a single file (-i without --format)."""
+    enc, conf = detect_encoding(filename, sample_size)
+    print(f"{C.BLUE}[INFO]{C.RESET} File '{C.CYAN}{filename}{C.RESET}' detected encoding: {C.YELLOW}{enc}{C.RESET} (confidence {conf*100:.1f}%)")
 
 def show_detailed_help():
     """Display extended help (--help)."""
@@ -291,6 +461,8 @@ If only -i and --format are provided, output file will be named FILE_FORMAT.ext
   --show EXT             Show encoding for all files with extension EXT.
   --stat                 Show file size/date and summaries.
   --rem                  (Requires --show) Aligns all columns for a clean output.
+  --sample-size BYTES    Feed at most BYTES of each file to the encoding detector
+                         (default = until the detector is certain).
 
   -d, --dir DIR          Source directory (default = current directory).
   -r, --recursive        Search recursively through subdirectories.
@@ -300,13 +472,21 @@ If only -i and --format are provided, output file will be named FILE_FORMAT.ext
   --help                 Show this detailed help.
 
 Requirements:
-  pip install chardet colorama
+  pip install chardetng-py colorama   (or: pip install chardet colorama)
 ============================================================
     """)
 
 # ===== Main function =====
 def main():
-    colorama.init()
+    # Fast paths for the most common shell-loop invocations ("--help", "-i FILE") skip argparse setup.
+    argv = sys.argv[1:]
+    if argv == ['--help']:
+        show_detailed_help()
+        return
+    if len(argv) == 2 and argv[0] in ('-i', '--input') and os.path.isfile(argv[1]):
+        show_file_encoding(argv[1])
+        return
+
     parser = argparse.ArgumentParser(description="Text file encoding detector and converter.", add_help=False)
     parser.add_argument('-i', '--input', dest='input_file', help='Input file to analyze')
     parser.add_argument('-o', '--output', dest='output_file', help='Output file after conversion')
@@ -320,11 +500,12 @@ def main():
     parser.add_argument('--rem', action='store_true', help='Align columns (with --show)')
     parser.add_argument('--color', action='store_true', help='Enable colorized output')
     parser.add_argument('--overwrite', action='store_true', help='Overwrite output file without asking')
+    parser.add_argument('--sample-size', dest='sample_size', type=int, help='Max bytes fed to the encoding detector')
     parser.add_argument('-h', action='help', help='Show short help')
     parser.add_argument('--help', action='store_true', help='Show detailed help')
 
     args = parser.parse_args()
-    C.set_enabled(args.color)
+    set_colors_enabled(args.color)
 
     if args.help:
         show_detailed_help()
@@ -335,8 +516,12 @@ def main():
         print(f"Supported formats are: {', '.join(SUPPORTED_FORMATS.keys())}")
         sys.exit(1)
 
+    if args.sample_size is not None and args.sample_size <= 0:
+        print(f"{C.RED}ERROR: --sample-size must be a positive number of bytes.{C.RESET}")
+        sys.exit(1)
+
     if args.show_ext:
-        show_files_info(args.show_ext, args.dir, args.recursive, args.stat, args.rem)
+        show_files_info(args.show_ext, args.dir, args.recursive, args.stat, args.rem, args.sample_size)
         return
     
     # === WYWOŁANIE ZMODYFIKOWANE (przekazanie 'args.overwrite') ===
@@ -344,13 +529,13 @@ def main():
         if not args.format:
             print(f"{C.RED}ERROR:{C.RESET} Using --all requires specifying --format.")
             return
-        process_all(args.ext, args.format, args.suffix, args.dir, args.recursive, args.overwrite)
+        process_all(args.ext, args.format, args.suffix, args.dir, args.recursive, args.overwrite, args.sample_size)
         return
     
     if args.input_file:
         # Przypadek 1: Podano -i, -o ORAZ --format
         if args.output_file and args.format:
-            convert_encoding(args.input_file, args.output_file, args.format)
+            convert_encoding(args.input_file, args.output_file, args.format, args.sample_size)
         
         # Przypadek 2: Podano -i ORAZ --format (ale BEZ -o)
         # -> Automatyczna nazwa pliku + sprawdzanie nadpisania
@@ -368,13 +553,12 @@ def main():
                     # Poprawiono też formatowanie nowej linii w tym miejscu
                     print(f"\n{C.YELLOW}Aborted by user (Ctrl+C). File not overwritten.{C.RESET}")
                     return
-            convert_encoding(args.input_file, auto_output, args.format)
+            convert_encoding(args.input_file, auto_output, args.format, args.sample_size)
 
         # Przypadek 3: Podano TYLKO -i (bez --format i -o)
         # -> Pokaż wykryte kodowanie
         elif not args.output_file:
-            enc, conf = detect_encoding(args.input_file)
-            print(f"{C.BLUE}[INFO]{C.RESET} File '{C.CYAN}{args.input_file}{C.RESET}' detected encoding: {C.YELLOW}{enc}{C.RESET} (confidence {conf*100:.1f}%)")
+            show_file_encoding(args.input_file, args.sample_size)
         
         # Przypadek 4: Inna, niepoprawna kombinacja (np. -i oraz -o, ale bez --format)
         else: